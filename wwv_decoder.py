@@ -1,6 +1,8 @@
 import sys
 import time
+import json
 import collections
+import collections.abc
 import datetime
 import numpy
 import numpy.fft
@@ -38,24 +40,112 @@ def plot_filter(b, a, sample_rate, freqs=None, title=""):
 def timed(message):
     def wrap(f):
         def wrapped_f(*args, **kwargs):
-            sys.stdout.write(message + "\n")
-            sys.stdout.flush()
-            tic = time.time()
-            rets = f(*args, **kwargs)
-            toc = time.time()
-            sys.stdout.write(" "*50 + "%.3f sec\n" % (toc-tic))
+            if STATS is None:
+                return f(*args, **kwargs)
+            stage = STATS.setdefault(f.__name__, {"description": message, "seconds": 0.0, "items": 0})
+            rets = measure(stage, f, *args, **kwargs)
+            # lazy stages are timed as they are consumed
+            if isinstance(rets, collections.abc.Iterator):
+                return timed_iter(stage, rets)
+            if hasattr(rets, "__len__"):
+                stage["items"] += len(rets)
             return rets
         return wrapped_f
     return wrap
 
+def measure(stage, f, *args, **kwargs):
+    # time spent in nested timed stages (eg. consuming an upstream generator)
+    # is subtracted, so each stage only counts its own work
+    TIMING_STACK.append(0.0)
+    tic = time.perf_counter()
+    try:
+        return f(*args, **kwargs)
+    finally:
+        total = time.perf_counter() - tic
+        stage["seconds"] += total - TIMING_STACK.pop()
+        if TIMING_STACK:
+            TIMING_STACK[-1] += total
+
+def timed_iter(stage, items):
+    while True:
+        try:
+            item = measure(stage, next, items)
+        except StopIteration:
+            return
+        stage["items"] += 1
+        yield item
+
+def peak_memory_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+def write_stats(path, wall):
+    audio = STATS["block_wave_file"]["items"] / SAMPLE_RATE if "block_wave_file" in STATS else 0
+    report = {
+        "audio_seconds": audio,
+        "wall_seconds": wall,
+        "realtime_factor": audio / wall if wall else None,
+        "peak_memory_kb": peak_memory_kb(),
+        "stages": [dict(stage=name, **stage) for (name, stage) in STATS.items()],
+    }
+    if path == "-":
+        sys.stderr.write(json.dumps(report, indent=2) + "\n")
+    else:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+def pop_option(name):
+    # remove --name or --name=value from the arguments, returning the value
+    for arg in sys.argv[1:]:
+        if arg == name or arg.startswith(name + "="):
+            sys.argv.remove(arg)
+            return arg.partition("=")[2] or "-"
+    return None
+
 ################################################################################
 
 SAMPLE_RATE = None
 THRESHOLD = None
+# per stage instrumentation, enabled with --stats
+STATS = None
+TIMING_STACK = []
+# fraction of each one second window's energy per tone, enabled with --tones
+TONES = None
+
+# standard frequencies and minute/hour markers
+TONE_FREQS = [440.0, 500.0, 600.0, 1000.0, 1200.0, 1500.0]
+STANDARD_FREQS = [440.0, 500.0, 600.0]
+MARKER_FREQS = [1000.0, 1200.0, 1500.0]
+TONE_SYMBOLS = {440.0: '4', 500.0: '5', 600.0: '6', 1000.0: 'K', 1200.0: 'M', 1500.0: 'H', None: '.'}
+TONE_THRESHOLD = 0.1
+
+# standard frequency per minute of the hour (None when silenced), as in
+# wwv_simulator.py. 440 Hz is omitted during the first hour of the day.
+def standard_schedule(even, odd, a440, silent):
+    tones = [even if m % 2 == 0 else odd for m in range(60)]
+    tones[a440] = 440.0
+    return [None if m in silent else tone for (m, tone) in enumerate(tones)]
+
+# second pulses, 5 ms of 1200 Hz, and DUT1 doubled pulses 100 ms later
+TICK_FREQ = 1200.0
+TICK_LENGTH = 5e-3
+DOUBLE_TICK_DELAY = 100e-3
+# second epoch statistics, enabled with --ticks
+TICK_STATS = None
+
+SCHEDULES = {
+    "WWV": standard_schedule(500.0, 600.0, 2, { 0, 3, 4, 8, 10, 18, 29, 30, 43, 44, 45, 46, 47, 48, 49, 50, 51, 52, 59 }),
+    "WWVH": standard_schedule(600.0, 500.0, 1, { 0, 3, 4, 8, 9, 10, 11, 14, 15, 16, 17, 18, 19, 29, 30, 45, 47, 48, 49, 50, 51, 52, 59 }),
+}
 
 ################################################################################
 
-#@timed("Reading wave file...")
+@timed("Reading wave file...")
 def block_wave_file(path, start=None, stop=None):
     global SAMPLE_RATE
 
@@ -68,23 +158,213 @@ def block_wave_file(path, start=None, stop=None):
 
     return samples
 
-#@timed("Bandpass filtering...")
+@timed("Detecting tones...")
+def block_tone_bank(samples, freqs, block=60):
+    global TONES
+
+    # Goertzel (single DFT bin) per frequency over each one second window,
+    # evaluated for a block of windows at a time as one product with the
+    # cos/sin basis rather than by the sample by sample recurrence
+    n = SAMPLE_RATE
+    seconds = len(samples) // n
+    phase = (2*numpy.pi*numpy.outer(numpy.arange(n), freqs))/SAMPLE_RATE
+    basis = numpy.hstack([numpy.cos(phase), numpy.sin(phase)])
+    TONES = numpy.zeros((seconds, len(freqs)))
+
+    for start in range(0, seconds, block):
+        stop = min(seconds, start + block)
+        windows = numpy.asarray(samples[start*n:stop*n], dtype=numpy.float64).reshape(stop - start, n)
+        energy = numpy.maximum(numpy.sum(windows**2, axis=1), 1e-12)
+        bins = windows @ basis
+        power = bins[:, :len(freqs)]**2 + bins[:, len(freqs):]**2
+        # fraction of the window energy in each tone: a sinusoid of
+        # amplitude A has power (A*n/2)**2 and energy A**2*n/2
+        TONES[start:stop] = 2*power / (n*energy[:, numpy.newaxis])
+
+    return samples
+
+@timed("Matched filtering ticks...")
+def block_tick_peaks(samples, block=10):
+    # correlation with a complex tick template, the magnitude is the tick
+    # envelope independent of phase
+    m = int(TICK_LENGTH*SAMPLE_RATE)
+    kernel = numpy.conj(numpy.exp(2j*numpy.pi*TICK_FREQ*numpy.arange(m)/SAMPLE_RATE))[::-1]
+    # longer tones (minute markers) still correlate 20 ms after their peak
+    gap = int(20e-3*SAMPLE_RATE)
+    n = block*SAMPLE_RATE
+    total = len(samples) - m + 1
+
+    for start in range(0, total, n):
+        # overlap-save across blocks (FFT overlap-add within): each block is
+        # extended by the template length and only fully overlapping outputs
+        # are kept. the envelope also extends a
+        # little either side so peaks at block edges are found.
+        stop = min(total, start + n)
+        lead = min(start, gap)
+        x = numpy.asarray(samples[start - lead:stop + m - 1 + gap], dtype=numpy.float64)
+        env = numpy.abs(scipy.signal.oaconvolve(x, kernel, mode='valid'))
+
+        # threshold at half the typical tick level, the median of the per
+        # second maxima (most seconds have a tick)
+        seconds = max(1, (stop - start)//SAMPLE_RATE)
+        level = numpy.median([numpy.max(env[lead + i*SAMPLE_RATE:lead + (i+1)*SAMPLE_RATE]) for i in range(seconds)])
+        if level <= 0:
+            continue
+        peaks, _ = scipy.signal.find_peaks(env, height=0.5*level, distance=gap)
+
+        # ticks cut off by the start or end of the recording are unreliable
+        peaks = peaks[(peaks >= lead) & (peaks < lead + stop - start) & (peaks >= m - start) & (peaks < len(env) - m)]
+        for p in peaks:
+            # sub-sample position by parabolic interpolation
+            d = 0.0
+            if 0 < p < len(env) - 1:
+                (a, b, c) = env[p-1:p+2]
+                if a - 2*b + c != 0:
+                    d = 0.5*(a - c)/(a - 2*b + c)
+            is_long = p + gap < len(env) and env[p + gap] > 0.5*env[p]
+            yield ((start - lead + p + d)/SAMPLE_RATE, env[p], is_long)
+
+def tick_phase(peaks, tolerance):
+    # the earliest tick in phase with the most other ticks (doubled ticks are
+    # out of phase but too few to win)
+    ticks = [t for (t, _, is_long) in peaks if not is_long]
+    if not ticks:
+        return None
+    in_phase = lambda t, u: abs((t - u + 0.5) % 1.0 - 0.5) < tolerance
+    best = max(ticks, key=lambda t: sum(in_phase(t, u) for u in ticks))
+    return min(t for t in ticks if in_phase(t, best))
+
+@timed("Tracking second epochs...")
+def block_tick_seconds(samples, tolerance=10e-3):
+    near = lambda t, target: abs(t - target) < tolerance
+    pending = []
+    epoch = None
+    period = 1.0
+    last = None
+
+    def classify(epoch):
+        ticks = [p for p in pending if near(p[0], epoch) and not p[2]]
+        doubles = [p for p in pending if near(p[0], epoch + DOUBLE_TICK_DELAY) and not p[2]]
+        marker = any(p[2] and epoch - tolerance <= p[0] < epoch + 0.8 for p in pending)
+        if ticks:
+            return (max(ticks, key=lambda p: p[1])[0], "double" if doubles else "tick")
+        return (epoch, "marker" if marker else "missing")
+
+    for peak in samples:
+        pending.append(peak)
+        if epoch is None:
+            # lock on once ten seconds of peaks are available
+            if peak[0] - pending[0][0] < 10:
+                continue
+            epoch = tick_phase(pending, tolerance)
+            if epoch is None:
+                # no short ticks yet, keep waiting with the latest ten seconds
+                pending = [p for p in pending if peak[0] - p[0] < 10]
+                continue
+
+        # classify each second once all of its peaks have arrived
+        while pending and pending[-1][0] >= epoch + 0.9:
+            (offset, kind) = classify(epoch)
+            yield (offset, kind)
+            if kind in ("tick", "double"):
+                # follow drift of the recording's sample clock
+                if last is not None and near(offset - last, 1.0):
+                    period = 0.9*period + 0.1*(offset - last)
+                last = offset
+            else:
+                last = None
+            epoch = offset + period
+            pending = [p for p in pending if p[0] >= epoch - tolerance]
+
+    # flush seconds with remaining peaks
+    while epoch is not None and pending and pending[-1][0] >= epoch - tolerance:
+        (offset, kind) = classify(epoch)
+        yield (offset, kind)
+        epoch = offset + period
+        pending = [p for p in pending if p[0] >= epoch - tolerance]
+
+@timed("Measuring tick jitter...")
+def block_tick_jitter(samples):
+    global TICK_STATS
+
+    TICK_STATS = collections.Counter()
+    epochs = []
+    for (i, (offset, kind)) in enumerate(samples):
+        TICK_STATS[kind] += 1
+        if kind in ("tick", "double"):
+            epochs.append((i, offset))
+        yield (offset, kind)
+
+    # period (the recording's clock rate) and jitter from a straight line
+    # fit of tick epochs against second number
+    if len(epochs) > 2:
+        (i, offset) = numpy.array(epochs).T
+        (period, first) = numpy.polyfit(i, offset - offset[0], 1)
+        residuals = offset - offset[0] - (first + period*i)
+        TICK_STATS["period"] = period
+        TICK_STATS["jitter"] = numpy.sqrt(numpy.mean(residuals**2))
+        TICK_STATS["worst"] = numpy.max(numpy.abs(residuals))
+
+@timed("Framing tick minutes...")
+def block_tick_minutes(samples):
+    # window from second 29 of the previous minute (one earlier after a leap
+    # second) to second 16 of this minute, second 0 at index 32
+    window = collections.deque(maxlen=49)
+    for second in samples:
+        window.append(second)
+        if len(window) < window.maxlen:
+            continue
+        kinds = [kind for (_, kind) in window]
+        if not (kinds[31] == "missing" and kinds[32] in ("marker", "missing") and kinds[33] in ("tick", "double") and
+                "missing" in (kinds[0], kinds[1])):
+            continue
+
+        # doubled ticks in seconds 1-8 give positive DUT1, 9-16 negative
+        doubles = [k for k in range(1, 17) if kinds[32 + k] == "double"]
+        if not doubles:
+            dut1 = 0.0
+        elif max(doubles) <= 8:
+            dut1 = 0.1*len(doubles)
+        elif min(doubles) >= 9:
+            dut1 = -0.1*len(doubles)
+        else:
+            dut1 = None
+        yield (window[32][0], dut1, doubles)
+
+@timed("Printing tick minutes...")
+def block_print_tick_minutes(samples, records):
+    for (offset, dut1, doubles) in samples:
+        # the BCD frame starts one second after the minute epoch
+        matched = [r for r in records if abs(r.Offset - 1.0 - offset) < 0.2]
+        line = f"{offset:10.4f} s DUT1={'?' if dut1 is None else f'{dut1:+.1f}'} doubled={doubles}"
+        if matched:
+            r = matched[0]
+            bcd = (1 if r.DUT1 else -1)*round(r.UT1_Corr, 1)
+            line = f"{r.Hours:02d}:{r.Minutes:02d} {line} BCD={bcd:+.1f} " + ("ok" if dut1 is not None and abs(dut1 - bcd) < 0.05 else "MISMATCH")
+        print(line)
+    if TICK_STATS and "period" in TICK_STATS:
+        period = TICK_STATS["period"]
+        print(f"ticks {TICK_STATS['tick']} doubled {TICK_STATS['double']} markers {TICK_STATS['marker']} missing {TICK_STATS['missing']}, " +
+              f"period {period:.7f} s ({(period - 1.0)*1e6:+.1f} ppm), " +
+              f"jitter {TICK_STATS['jitter']*1e3:.3f} ms rms {TICK_STATS['worst']*1e3:.3f} ms max")
+
+@timed("Bandpass filtering...")
 def block_bandpass_filter_iir(samples, fLow, fHigh):
     b,a = scipy.signal.butter(3, [(2*fLow)/(SAMPLE_RATE), (2*fHigh)/(SAMPLE_RATE)], btype='bandpass')
     #plot_filter(b, a, SAMPLE_RATE, range(1000))
     return scipy.signal.lfilter(b, a, samples)
 
-#@timed("Rectifying...")
+@timed("Rectifying...")
 def block_rectify(samples):
     return numpy.abs(samples)
 
-#@timed("Low pass filtering...")
+@timed("Low pass filtering...")
 def block_lowpass_filter_iir(samples, fC):
     b, a = scipy.signal.butter(4, (2*fC)/SAMPLE_RATE)
     #plot_filter(b, a, SAMPLE_RATE, range(1000))
     return scipy.signal.lfilter(b, a, samples)
 
-#@timed("Finding threshold...")
+@timed("Finding threshold...")
 def block_find_threshold(samples):
     global THRESHOLD
 
@@ -107,7 +387,7 @@ def block_find_threshold(samples):
 
     return samples
 
-#@timed("Thresholding...")
+@timed("Thresholding...")
 def block_threshold(samples):
     samples = numpy.copy(samples)
 
@@ -118,7 +398,7 @@ def block_threshold(samples):
 
     return samples
 
-#@timed("Converting samples to pulse widths...")
+@timed("Converting samples to pulse widths...")
 def block_pulse_widths(samples):
     widths = []
 
@@ -134,7 +414,7 @@ def block_pulse_widths(samples):
 
     return pulses
 
-#@timed("Filtering pulse widths...")
+@timed("Filtering pulse widths...")
 def block_filter_pulse_widths(samples):
     state = []
 
@@ -157,7 +437,7 @@ def block_filter_pulse_widths(samples):
     if len(state) > 0:
         yield (state[0][0], sum([w for (_,w) in state]))
 
-#@timed("Converting pulse widths to symbols...")
+@timed("Converting pulse widths to symbols...")
 def block_pulse_widths_to_symbols(samples):
     # approximately equal means actual is within +/- 25% of expected
     approx_equal = lambda actual, expected: abs(actual - expected) < 0.25*expected
@@ -176,7 +456,7 @@ def block_pulse_widths_to_symbols(samples):
         else:
             yield (offset, "I")
 
-#@timed("Converting symbols to frame...")
+@timed("Converting symbols to frame...")
 def block_symbols_to_frame(samples):
     template = [     0 , 'B', 'B', 'B', 'B', 'B', 'B',  0 , 'M',
                     'B', 'B', 'B', 'B',  0 , 'B', 'B', 'B',  0 , 'M',
@@ -206,17 +486,18 @@ def block_symbols_to_frame(samples):
             if not numpy.all(matches):
                 continue
 
-            # Emit the symbols of the valid frame
+            # Emit the offset of second 1 and the symbols of the valid frame
             #print("Valid frame found!")
-            yield symbols
+            yield (offsets[0], symbols)
 
             # Reset the state
             state = [None]*59
 
+@timed("Converting frames to records...")
 def block_frame_to_wwv_record(samples):
-    WWVRecord = collections.namedtuple('WWVRecord', ['DST1', 'LSW', 'Year', 'Minutes', 'Hours', 'Day_of_year', 'DUT1', 'DST2', 'UT1_Corr'])
+    WWVRecord = collections.namedtuple('WWVRecord', ['DST1', 'LSW', 'Year', 'Minutes', 'Hours', 'Day_of_year', 'DUT1', 'DST2', 'UT1_Corr', 'Offset'])
 
-    for frame in samples:
+    for (offset, frame) in samples:
         dst1 = bool(frame[1])
         lsw = bool(frame[2])
         year = 1*frame[3] + 2*frame[4] + 4*frame[5] + 8*frame[6] + 10*frame[50] + 20*frame[51] + 40*frame[52] + 80*frame[53]
@@ -225,10 +506,11 @@ def block_frame_to_wwv_record(samples):
         day_of_year = 1*frame[29] + 2*frame[30] + 4*frame[31] + 8*frame[32] + 10*frame[34] + 20*frame[35] + 40*frame[36] + 80*frame[37] + 100*frame[39] + 200*frame[40]
         dut1 = bool(frame[49])
         dst2 = bool(frame[54])
-        ut1_corr = 0.1*frame[55] + 0.2*frame[56] + 0.3*frame[57]
+        ut1_corr = 0.1*frame[55] + 0.2*frame[56] + 0.4*frame[57]
 
-        yield WWVRecord(dst1, lsw, year, minutes, hours, day_of_year, dut1, dst2, ut1_corr)
+        yield WWVRecord(dst1, lsw, year, minutes, hours, day_of_year, dut1, dst2, ut1_corr, offset)
 
+@timed("Printing records...")
 def block_print_wwv_record(samples):
     for record in samples:
         dt = datetime.datetime.strptime(str(record.Year), "%y")
@@ -239,6 +521,81 @@ def block_print_wwv_record(samples):
               f"DUT1={'+' if record.DUT1 else '-'}{record.UT1_Corr} " +
               f"leap second{' ' if record.LSW else ' not '}scheduled")
 
+def window_tone(i, freqs):
+    # strongest of freqs in window i, if it holds enough of the energy
+    if TONES is None or not 0 <= i < len(TONES):
+        return None
+    levels = [TONES[i][TONE_FREQS.index(f)] for f in freqs]
+    j = int(numpy.argmax(levels))
+    return freqs[j] if levels[j] > TONE_THRESHOLD else None
+
+@timed("Identifying minute tones...")
+def block_wwv_record_tones(samples):
+    ToneRecord = collections.namedtuple('ToneRecord', ['Record', 'Minute_index', 'Marker', 'Tone', 'Seconds'])
+
+    first = None
+    for record in samples:
+        # the frame starts at second 1, windows are aligned to whole seconds
+        # of the file so check both windows overlapping second 0
+        start = record.Offset - 1.0
+        window = int(numpy.floor(start))
+        markers = [window_tone(window + k, MARKER_FREQS) for k in (0, 1)]
+        marker = markers[0] or markers[1]
+        if markers[0] is None and markers[1] is not None:
+            window += 1
+
+        # per second tone, standard frequency is the majority in seconds 1-44
+        seconds = [window_tone(window + k, TONE_FREQS) for k in range(60)]
+        counts = collections.Counter(t for t in seconds[1:45] if t in STANDARD_FREQS)
+        tone = counts.most_common(1)[0][0] if counts and counts.most_common(1)[0][1] > 22 else None
+
+        first = start if first is None else first
+        yield ToneRecord(record, int(round((start - first)/60.0)), marker, tone, seconds)
+
+def schedule_matches(station, minute, record, hour=None):
+    expected = SCHEDULES[station][minute]
+    # 440 Hz is silent in the first hour of the day
+    if expected == 440.0 and hour in (0, None) and record.Tone is None:
+        expected = None
+    marker_ok = record.Marker is None or (record.Marker == 1500.0) == (minute == 0)
+    return record.Tone == expected and marker_ok
+
+def infer_schedule(tone_records):
+    # match observed tones against each station's schedule for every possible
+    # minute of the hour of the first record, independently of the BCD time code
+    scores = [(sum(schedule_matches(station, (first + r.Minute_index) % 60, r) for r in tone_records), station, first)
+              for station in SCHEDULES for first in range(60)]
+    best = max(score for (score, _, _) in scores)
+    return (best, [(station, first) for (score, station, first) in scores if score == best])
+
+@timed("Printing tone records...")
+def block_print_tone_records(samples):
+    samples = list(samples)
+    if not samples:
+        return
+    for r in samples:
+        # cross-check against the schedule at the decoded minute, a corrupt
+        # frame can still decode minutes up to 79
+        if r.Record.Minutes < 60:
+            stations = [station for station in SCHEDULES if schedule_matches(station, r.Record.Minutes, r, r.Record.Hours)]
+            check = f"fits {'/'.join(stations)}" if stations else "MISMATCH"
+        else:
+            check = "INVALID MINUTE"
+        print(f"{r.Record.Hours:02d}:{r.Record.Minutes:02d} " +
+              f"marker={int(r.Marker) if r.Marker else '-'} tone={int(r.Tone) if r.Tone else '-'} " +
+              "".join(TONE_SYMBOLS[t] for t in r.Seconds) + " " +
+              check)
+
+    (score, candidates) = infer_schedule(samples)
+    if len(candidates) == 1:
+        (station, first) = candidates[0]
+        agree = sum((first + r.Minute_index) % 60 == r.Record.Minutes for r in samples)
+        print(f"tones match {station} from minute {first:02d} ({score}/{len(samples)} minutes), " +
+              f"BCD agrees for {agree}/{len(samples)}")
+    else:
+        stations = sorted(set(station for (station, _) in candidates))
+        print(f"tones ambiguous, {len(candidates)} schedules ({'/'.join(stations)}) match {score}/{len(samples)} minutes")
+
 def block_plot(samples, n=None, title=""):
     plt.plot(samples[0:n])
     plt.ylabel('Value')
@@ -250,13 +607,20 @@ def print_table(samples):
     if not samples:
         return
     sys.stdout.write("  ")
-    for (i, frame) in enumerate(samples[0]):
+    for (i, frame) in enumerate(samples[0][1]):
         sys.stdout.write("%s%s" % (str(frame), "\n" if (i + 1) % 10 == 9 else " "))
 
 ################################################################################
 
+stats_path = pop_option("--stats")
+show_tones = pop_option("--tones")
+show_ticks = pop_option("--ticks")
+if stats_path:
+    STATS = {}
+tic = time.perf_counter()
+
 if len(sys.argv) < 2:
-    print("Usage: %s <recorded WWV wave file> [start] [stop]" % sys.argv[0])
+    print("Usage: %s [--stats[=FILE]] [--tones] [--ticks] <recorded WWV wave file> [start] [stop]" % sys.argv[0])
     sys.exit(1)
 elif len(sys.argv) == 2:
     samples = block_wave_file(sys.argv[1])
@@ -265,6 +629,10 @@ elif len(sys.argv) == 3:
 elif len(sys.argv) >= 4:
     samples = block_wave_file(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]))
 
+if show_ticks:
+    ticks = block_tick_minutes(block_tick_jitter(block_tick_seconds(block_tick_peaks(samples))))
+if show_tones:
+    samples = block_tone_bank(samples, TONE_FREQS)
 samples = block_bandpass_filter_iir(samples, 95.0, 105.0)
 samples = block_rectify(samples)
 samples = block_lowpass_filter_iir(samples, 5.0)
@@ -277,6 +645,13 @@ samples = block_pulse_widths_to_symbols(samples)
 samples = block_symbols_to_frame(samples)
 samples = list(samples)
 table = samples
-samples = block_frame_to_wwv_record(samples)
+samples = list(block_frame_to_wwv_record(samples))
 block_print_wwv_record(samples)
+if show_tones:
+    block_print_tone_records(block_wwv_record_tones(samples))
+if show_ticks:
+    block_print_tick_minutes(ticks, samples)
 #print_table(table)
+
+if STATS is not None:
+    write_stats(stats_path, time.perf_counter() - tic)
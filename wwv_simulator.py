@@ -1,10 +1,11 @@
 from subprocess import Popen, PIPE
 from enum import Flag, auto
+from collections import namedtuple
 from tempfile import TemporaryDirectory as tmpdir
 from datetime import datetime, timedelta
 from urllib.request import urlopen
-from functools import reduce
 from math import log
+from array import array
 import shutil
 import calendar
 import time
@@ -14,16 +15,23 @@ import argparse
 import sys
 import re
 import json
+import struct
+import asyncio
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
 
 cache = {}
 sox = "sox"
 espeak_ng = "espeak"
-rate = 44100
-bits = 16
 vol = 0.1
-raw = f"-t raw -r{rate} -es -b{bits}"
-second_bytes = rate * bits // 8
-minute_bytes = second_bytes * 60
+# file sink write buffer
+sink_buffer = 1 << 20
+# server playout buffer and slow listener limits (seconds)
+serve_buffer = 10
+serve_timeout = 3
 
 FINALS_CACHE = "9_FINALS.ALL_IAU2000_V2013_019.txt"
 FINALS_URL = "https://datacenter.iers.org/data/latestVersion/9_FINALS.ALL_IAU2000_V2013_019.txt"
@@ -50,9 +58,32 @@ class Tones(Flag):
     H500 = auto()
     H600 = auto()
 
+"""
+Sample format of generated audio.
+"""
+class AudioFormat(namedtuple("AudioFormat", ["rate", "bits", "channels"])):
+    @property
+    def raw(self):
+        return f"-t raw -r{self.rate} -es -b{self.bits} -c{self.channels}"
+
+    @property
+    def frame_bytes(self):
+        return self.bits // 8 * self.channels
+
+    @property
+    def second_bytes(self):
+        return self.rate * self.frame_bytes
+
+    @property
+    def minute_bytes(self):
+        return self.second_bytes * 60
+
+default_fmt = AudioFormat(44100, 16, 1)
+
 station_names = {
     "wwv": Stations.WWV,
     "wwvh": Stations.WWVH,
+    "both": Stations.WWV | Stations.WWVH,
 }
 
 scripts = {
@@ -232,9 +263,9 @@ def get_dst(now):
 """
 Generate speech.
 """
-def speak(message, announcer, delay=0, duration=0):
+def speak(message, announcer, fmt, delay=0, duration=0):
     speak_proc = Popen([espeak_ng, "--stdout"] + announcer.split() + [message], stdout=PIPE)
-    sox_proc = run(f"{sox} -V1 -t wav - {raw} - delay {delay} vol {vol} trim 0 {duration}", stdin=speak_proc.stdout, stdout=PIPE)
+    sox_proc = run(f"{sox} -V1 -t wav - {fmt.raw} - delay {delay} vol {vol} trim 0 {duration}", stdin=speak_proc.stdout, stdout=PIPE)
     return sox_proc.stdout.read();
 
 """
@@ -251,7 +282,7 @@ def get_hertz(station, minute):
 """
 Merge audio data.
 """
-def merge_audio(*audios):
+def merge_audio(fmt, *audios):
     with tmpdir() as tmp:
         files = []
         for (i, a) in enumerate(audios):
@@ -259,53 +290,65 @@ def merge_audio(*audios):
             with open(file, 'wb') as f:
                 f.write(a)
             files.append(file)
-        merge_str = " ".join([ f"{raw} {file}" for file in files])
+        merge_str = " ".join([ f"{fmt.raw} {file}" for file in files])
         gain_arg = "gain %s" % (20 * log(len(audios)) / log(10))
-        merged = run(f"{sox} -m {merge_str} {raw} - {gain_arg}", stdout=PIPE)
+        merged = run(f"{sox} -m {merge_str} {fmt.raw} - {gain_arg}", stdout=PIPE)
         return merged.stdout.read()
 
 """
-Merge and cache tones.
+Mix (gain, delay, data) inputs, delaying each by a number of bytes.
 """
-def merge_tones(tones):
-    # OR tone enums for cache
-    key = tones[0]
-    [key := key | k for k in tones[1:]]
-    if key in cache:
-        return cache.get(key)
+def mix_audio(fmt, *inputs):
+    with tmpdir() as tmp:
+        files = []
+        for (i, (gain, delay, a)) in enumerate(inputs):
+            file = os.path.join(tmp, f"audio{i}")
+            with open(file, 'wb') as f:
+                f.write(bytes(delay))
+                f.write(a)
+            # explicit volumes replace the 1/n scaling of -m
+            files.append(f"-v {gain} {fmt.raw} {file}")
+        mixed = run(f"{sox} -m {' '.join(files)} {fmt.raw} -", stdout=PIPE)
+        return mixed.stdout.read()
+
+"""
+Merge tones.
+"""
+def merge_tones(tones, fmt):
     selected = [ scripts[t] for t in tones ]
     with tmpdir() as tmp:
         files = []
         for (i, script) in enumerate(selected):
             path = os.path.join(tmp, f"script{i}")
             with open(path, 'w') as f:
-                proc = run(f"{sox} -n {raw} - {script} vol {vol}", stdout=f).wait()
+                proc = run(f"{sox} -n {fmt.raw} - {script} vol {vol}", stdout=f).wait()
             files.append(path)
         # raw formatted file inputs
-        merge_str = " ".join([ f"{raw} {file}" for file in files])
+        merge_str = " ".join([ f"{fmt.raw} {file}" for file in files])
         # -m only if we are actually combining
         mix_arg = "-m " if len(tones) > 1 else ""
         # gain to make up for automatically reduced volume during merge
         gain_arg = "gain %s" % (20 * log(len(tones)) / log(10))
-        merged = run(f"{sox} {mix_arg}{merge_str} {raw} - {gain_arg}", stdout=PIPE)
-        cache[key] = merged.stdout.read()
-    return cache.get(key)
+        merged = run(f"{sox} {mix_arg}{merge_str} {fmt.raw} - {gain_arg}", stdout=PIPE)
+        return merged.stdout.read()
 
 """
 Ionospheric experiment announcement.
 """
-def io_exp_announce(station, now):
-    return speak(exp_notice_text[station], announcers[station], 1, 44)
+def io_exp_announce(station, now, fmt):
+    return speak(exp_notice_text[station], announcers[station], fmt, 1, 44)
 
 """
 Ionospheric experiment.
 """
-def io_exp(station, now):
+def io_exp(station, now, fmt):
     synth_str = ' '.join((s.strip() for s in exp_synth.splitlines())).strip()
-    sox_cmd = f"{sox} -n {raw} - {synth_str}"
+    # synthesised at full rate, as some filters are above the nyquist frequency
+    # of low rate formats, then converted
+    sox_cmd = f"{sox} -r44100 -n {fmt.raw} - {synth_str}"
     io_out = run(sox_cmd, stdout=PIPE).stdout.read()
-    speech_out = speak(exp_text, announcers[station], 1, 44)
-    return merge_audio(io_out, speech_out)
+    speech_out = speak(exp_text, announcers[station], fmt, 1, 44)
+    return merge_audio(fmt, io_out, speech_out)
 
 """
 Get HackerNews top posts.
@@ -319,39 +362,39 @@ def hackernews_posts():
 """
 MARS announcements (HackerNews top posts).
 """
-def mars_announce(station, now):
+def mars_announce(station, now, fmt):
     stories = hackernews_posts()
-    return speak(f"Top posts from news dot why combinator dot com. {stories}", announcers[station], 1, 44)
+    return speak(f"Top posts from news dot why combinator dot com. {stories}", announcers[station], fmt, 1, 44)
 
 """
 WWVH broadcast availability announcement.
 """
-def availability(station, now):
-    return speak(availability_text_wwvh, announcers[station], 1, 44)
+def availability(station, now, fmt):
+    return speak(availability_text_wwvh, announcers[station], fmt, 1, 44)
 
 """
 Station ID.
 """
-def station_id(station, now):
+def station_id(station, now, fmt):
     message = station_id_text[station] + station_signoff_text
     if station == Stations.WWVH:
         message += " Aloha."
-    return speak(message, announcers[station], 1, 44)
+    return speak(message, announcers[station], fmt, 1, 44)
 
 """
 Geophysical alerts.
 """
-def geoalerts(station, now):
+def geoalerts(station, now, fmt):
     message = curl(GEOALERT_URL)
     message = " ".join(message.splitlines()[6:])
-    return speak(message, announcers[station], 1, 44)
+    return speak(message, announcers[station], fmt, 1, 44)
 
 """
 Time announcement.
 """
-def time_announce(station, next, delay):
+def time_announce(station, next, delay, fmt):
     message = f"At the tone, {next.hour} hours, {next.minute} minutes, Coordinated Universal Time"
-    return speak(message, announcers[station], delay, 15)
+    return speak(message, announcers[station], fmt, delay, 15)
 
 """
 Binary coded decimal time code.
@@ -401,16 +444,14 @@ def bcd_frame(now, dut1, leap_second):
     return frame[1:]
 
 """
-Generate a minute of audio.
+Seconds that are overlaid with a short tick.
 """
-def gen_minute(minute, station, dut1, leap_second):
-    #err(f"Generating {station} {minute}")
-    bcd_next = lambda: bcd.pop(0)
-    normal_tick = lambda: merge_tones([bcd_next()] + freq)
-    extra_tick = lambda: merge_tones([Tones.EXTRA_TICK, bcd_next()] + freq)
-    no_freq_tick = lambda: merge_tones([bcd_next()])
-    repeat = lambda d, n: reduce(lambda a,b: a+b, (d() for _ in range(n)), b"")
+tick_seconds = [ i for i in range(60) if i not in [0, 29, 59] ]
 
+"""
+Get the OR-ed tones for each second of a minute.
+"""
+def minute_cells(minute, station, dut1, leap_second):
     # bcd frame
     bcd = bcd_frame(minute, dut1, leap_second)
 
@@ -420,59 +461,274 @@ def gen_minute(minute, station, dut1, leap_second):
     if freq is None or \
             (station == Stations.WWV and minute.hour == 0 and minute.minute == 2) or \
             (station == Stations.WWVH and minute.hour == 0 and minute.minute == 1):
-        freq = []
-    else:
-        freq = [freq]
-
-    # hour or minute tone
-    first = Tones.HOUR if minute.minute == 0 else Tones.MINUTE
-    data = merge_tones([first])
+        freq = Tones(0)
 
     # first 16 ticks after minute encode DUT1 correction
     # each double tick is 1ms of difference between UTC and UT1
     # if the double ticks occur in the first 8 seconds the difference is positive, else negative
-    dut1_ticks = repeat(normal_tick, 8) if dut1 <= 0 else b""
-    dut1_ticks += repeat(extra_tick, int(abs(dut1 / 1) * 10)) + repeat(normal_tick, int(8 - abs(dut1 / 1) * 10))
-    dut1_ticks += repeat(normal_tick, 8) if dut1 > 0 else b""
+    extra = min(int(abs(dut1 / 1) * 10), 8)
+    first_extra = 1 if dut1 > 0 else 9
+    extra_ticks = range(first_extra, first_extra + extra)
+
+    # hour or minute tone
+    cells = [ Tones.HOUR if minute.minute == 0 else Tones.MINUTE ]
+    for (i, symbol) in enumerate(bcd, 1):
+        cell = symbol
+        # standard freq silenced from 45 seconds for the time announcement
+        if i < 45:
+            cell |= freq
+        if i in extra_ticks:
+            cell |= Tones.EXTRA_TICK
+        cells.append(cell)
+
+    # just add another short BCD tone for leap second
+    if leap_second and minute.hour == 23 and minute.minute == 59:
+        cells.append(Tones.BCD_SHORT)
 
+    return cells
+
+"""
+Precomputed one second cells (tones x tick variant) in a contiguous buffer.
+"""
+class CellStore(object):
+    def __init__(self, fmt):
+        freqs = [ Tones(0), Tones.H440, Tones.H500, Tones.H600 ]
+        bcds = [ Tones.BCD_LONG, Tones.BCD_SHORT, Tones.BCD_MARKER ]
+        keys = [ Tones.HOUR, Tones.MINUTE ]
+        keys += [ e | b | f for e in [Tones(0), Tones.EXTRA_TICK] for b in bcds for f in freqs ]
+
+        self.tick = merge_tones([Tones.TICK_SHORT], fmt)
+        # bytes of silence before the tick, the tail of the previous second
+        self.lead = int(0.01 * fmt.rate) * fmt.frame_bytes
+
+        # row index for each (tones, tick at start, tick lead-in at end)
+        self.index = {}
+        self.data = array({ 8: 'b', 16: 'h', 32: 'i' }.get(fmt.bits, 'B'))
+        for key in keys:
+            audio = merge_tones([ t for t in Tones if t in key ], fmt)
+            audio = audio[:fmt.second_bytes].ljust(fmt.second_bytes, b"\0")
+            for head in [False, True]:
+                for tail in [False, True]:
+                    cell = bytearray(audio)
+                    if head:
+                        cell[:len(self.tick) - self.lead] = self.tick[self.lead:]
+                    if tail:
+                        cell[-self.lead:] = self.tick[:self.lead]
+                    self.index[(key, head, tail)] = len(self.index)
+                    self.data.frombytes(cell)
+        self.view = memoryview(self.data).cast('B')
+        self.nbytes = len(self.view)
+        self.fmt = fmt
+
+    def __repr__(self):
+        return f"CellStore({len(self.index)} cells, {self.nbytes} bytes, {self.fmt})"
+
+    def rows(self, cells):
+        ticks = lambda i: (i in tick_seconds, i + 1 in tick_seconds)
+        return [ self.index[(cell, *ticks(i))] for (i, cell) in enumerate(cells) ]
+
+    def row(self, r):
+        size = self.fmt.second_bytes
+        return self.view[r*size:(r+1)*size]
+
+    def gather(self, rows):
+        return bytearray().join(self.row(r) for r in rows)
+
+stores = {}
+stores_lock = threading.Lock()
+
+"""
+Get the cell store for a format, building it on first use.
+"""
+def cell_store(fmt):
+    store = stores.get(fmt)
+    if store is None:
+        with stores_lock:
+            store = stores.get(fmt)
+            if store is None:
+                store = stores[fmt] = CellStore(fmt)
+    return store
+
+"""
+Overlay short ticks at the given seconds.
+"""
+def stamp_ticks(data, seconds, fmt, blank=False):
+    # to force silence at tick during announcements etc. render them separately
+    # and copy directly to the bytearray
+    store = cell_store(fmt)
+    (tick, lead) = (store.tick, store.lead)
+    if blank:
+        tick = bytes(len(tick))
+    for i in seconds:
+        if i in tick_seconds:
+            j = i * fmt.second_bytes - lead # 0.01 silence before tick
+            data[j:j+len(tick)] = tick
+
+"""
+Merge audio over seconds start to end of data, retaining ticks.
+"""
+def overlay(data, start, end, audio, fmt):
+    (i, j) = (start * fmt.second_bytes, end * fmt.second_bytes)
+    data[i:j] = merge_audio(fmt, data[i:j], audio)[:j-i]
+    stamp_ticks(data, range(start, end + 1), fmt)
+
+"""
+Tone bed of the previous minute, updated per changed second.
+"""
+class MinuteBed(object):
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.rows = []
+        self.data = bytearray()
+        # updates may overlap when running faster than real time
+        self.lock = threading.Lock()
+
+    def update(self, cells):
+        store = cell_store(self.fmt)
+        rows = store.rows(cells)
+        if not self.rows:
+            self.data = store.gather(rows)
+            self.rows = rows
+            return list(range(len(rows)))
+        # leap seconds change the length of the minute
+        size = self.fmt.second_bytes
+        del self.data[len(rows) * size:]
+        changed = [ i for (i, r) in enumerate(rows) if i >= len(self.rows) or self.rows[i] != r ]
+        for i in changed:
+            self.data[i*size:(i+1)*size] = store.row(rows[i])
+        self.rows = rows
+        return changed
+
+"""
+Generate the announcements of a minute.
+"""
+def gen_speech(minute, station, fmt):
     # potential announcement during 1-45 seconds
-    announce = dut1_ticks
-    announce += repeat(normal_tick, 12) # 16-28 normal
-    announce += merge_tones([bcd_next()] + freq) # 29 second silenced
-    announce += repeat(normal_tick, 15) # 30-44 normal
-    # check for announcement
     announcement = announcements[station].get(minute.minute)
     if announcement:
-        announce = merge_audio(announce, eval(announcement)(station, minute))
-    data += announce
+        announcement = eval(announcement)(station, minute, fmt)
 
     # time announcement in last 15 seconds
-    time = repeat(no_freq_tick, 14) # 45-59 standard freq silenced
     next = minute + timedelta(minutes=1)
-    data += merge_audio(time, time_announce(station, next, 1 if station == Stations.WWVH else 7.5)) # merge announcement
-    data += merge_tones([bcd_next()]) # 59 second silenced, standard freq silenced
+    return (announcement, time_announce(station, next, 1 if station == Stations.WWVH else 7.5, fmt))
 
-    # to force silence at tick during announcements etc. render them separately
-    # and copy directly to the bytearray
-    short_tick = merge_tones([Tones.TICK_SHORT])
-    l = len(short_tick)
-    data = list(data)
-    ms10 = 0.01 * second_bytes
-    for i in [i for i in range(60) if i not in [0, 29, 59]]:
-        j = int(i * second_bytes - ms10) # 0.01 silence before tick
-        data[j:j+l] = short_tick
-    data = bytes(data)
+"""
+Announcements of a minute as one track from second 0, silent at ticks.
+"""
+def speech_track(minute, station, fmt):
+    (announcement, clock) = gen_speech(minute, station, fmt)
+    size = fmt.second_bytes
+    track = bytearray(59 * size)
+    if announcement:
+        announcement = announcement[:44*size]
+        track[size:size+len(announcement)] = announcement
+    clock = clock[:14*size]
+    track[45*size:45*size+len(clock)] = clock
+    stamp_ticks(track, range(1, 60), fmt, blank=True)
+    return track
 
-    # just add another short BCD tone for leap second
-    if leap_second and minute.hour == 23 and minute.minute == 59:
-        data += merge_tones([Tones.BCD_SHORT])
+"""
+Both stations heard at once, mixed with per-station gain and propagation delay.
+"""
+class StationMix(object):
+    def __init__(self, gains, delays, fmt):
+        self.fmt = fmt
+        self.gains = gains
+        # delays (seconds) in whole frames
+        self.delays = { s: int(d * fmt.rate) * fmt.frame_bytes for (s, d) in delays.items() }
+        # tone beds and cell store rows are shared by both stations, so each
+        # bed only differs where the standard frequencies do
+        self.beds = { s: MinuteBed(fmt) for s in gains }
+        # delayed audio running past the end of the previous minute, and the
+        # minute it runs into
+        self.carry = b""
+        self.next = None
+        self.lock = threading.Lock()
+
+    def render(self, minute, dut1, leap_second):
+        # speech doesn't depend on the previous minute, so both stations'
+        # espeak and sox processes run at once
+        tracks = {}
+        threads = [ threading.Thread(target=lambda s: tracks.__setitem__(s, speech_track(minute, s, self.fmt)), args=(s,)) for s in self.gains ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # one mix of both beds and tracks, plus the carry from the last minute
+        # if this minute follows it (playout skips minutes it can't render in
+        # time)
+        with self.lock:
+            inputs = [ (1, 0, self.carry) ] if self.carry and minute == self.next else []
+            for (s, bed) in self.beds.items():
+                bed.update(minute_cells(minute, s, dut1, leap_second))
+                inputs += [ (self.gains[s], self.delays[s], bed.data), (self.gains[s], self.delays[s], tracks[s]) ]
+            size = len(bed.data)
+            mixed = mix_audio(self.fmt, *inputs)
+            self.carry = mixed[size:]
+            self.next = minute + timedelta(minutes=1)
+            return mixed[:size]
+
+"""
+Generate a minute of audio.
+"""
+def gen_minute(minute, station, dut1, leap_second, fmt, bed=None):
+    #err(f"Generating {station} {minute}")
+    if station == Stations.WWV | Stations.WWVH:
+        return bed.render(minute, dut1, leap_second)
+
+    bed = bed or MinuteBed(fmt)
+    with bed.lock:
+        bed.update(minute_cells(minute, station, dut1, leap_second))
+        data = bytearray(bed.data)
+
+    (announcement, clock) = gen_speech(minute, station, fmt)
+    if announcement:
+        overlay(data, 1, 45, announcement, fmt)
+    overlay(data, 45, 59, clock, fmt)
 
     return data
 
+"""
+Argument type for values that can't be negative.
+"""
+def non_negative(value):
+    value = float(value)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"{value} is negative")
+    return value
+
+"""
+Argument type for counts of at least one.
+"""
+def positive(value):
+    value = int(value)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{value} is less than 1")
+    return value
+
+"""
+Argument type for clock speeds.
+"""
+def clock_speed(value):
+    value = float(value)
+    if not 0 < value < float("inf"):
+        raise argparse.ArgumentTypeError(f"{value} is not a finite speed above zero")
+    return value
+
+"""
+Argument type for sample rates that can carry the 1500 Hz hour tone.
+"""
+def sample_rate(value):
+    value = int(value)
+    if value <= 3000:
+        raise argparse.ArgumentTypeError(f"{value} Hz is too low for the 1500 Hz hour tone (must be above 3000 Hz)")
+    return value
+
 """
 Get number of samples into the current minute.
 """
-def sample_offset(start, now=None):
+def sample_offset(start, fmt, now=None):
     # microseconds into the minute when we generated audio_data
     microseconds = start.second * 1e6 + start.microsecond
     # any delay between generation and now
@@ -480,58 +736,422 @@ def sample_offset(start, now=None):
     # ratio of whole minute to offset
     expired = (microseconds + delay) / 120e6
     # get offset for 1 minute of audio data
-    offset = int(minute_bytes * 2 * expired)
-    # even to prevent audio glitch (16-bit)
-    if offset % 2 != 0:
-        offset -= 1
+    offset = int(fmt.minute_bytes * 2 * expired)
+    # whole frames to prevent audio glitch
+    offset -= offset % fmt.frame_bytes
     # return trimmed data
     return offset
 
 """
 Update audio data object.
 """
-def update_data(data, time):
-    (dut1, leap_second) = get_dut1(time)
-    audio = gen_minute(time, station, dut1, leap_second)
-    data.swap_inactive(audio)
+def update_data(data, minute, bed, stats):
+    tic = time.monotonic()
+    stats.start()
+    swaps = data.swaps
+    (dut1, leap_second) = get_dut1(minute)
+    audio = gen_minute(minute, station, dut1, leap_second, data.fmt, bed)
+    # a late minute is dropped, playout has already counted the miss
+    data.swap_inactive(audio, swaps)
+    stats.render(time.monotonic() - tic)
 
 """
 Print date/time to stderr.
 """
-def run_clock(offset):
+def run_clock(clock, offset):
     while True:
         sys.stderr.write("\x1b[1K\r")
-        sys.stderr.write((datetime.utcnow() + offset).strftime("%d/%m/%Y, %H:%M:%S"))
+        sys.stderr.write((clock.now() + offset).strftime("%d/%m/%Y, %H:%M:%S"))
         sys.stderr.flush()
-        time.sleep(1 - datetime.utcnow().microsecond / 1e6)
+        clock.sleep(1 - clock.now().microsecond / 1e6)
+
+"""
+Broadcast clock, optionally running faster than real time.
+"""
+class Clock(object):
+    def __init__(self, speed=1):
+        self.speed = speed
+        self.start = datetime.utcnow()
+        self.t0 = time.monotonic()
+
+    def elapsed(self):
+        return (time.monotonic() - self.t0) * self.speed
+
+    def now(self):
+        return self.start + timedelta(seconds=self.elapsed())
+
+    def sleep(self, seconds):
+        time.sleep(seconds / self.speed)
+
+    def tick(self):
+        # sleep until next tick
+        self.sleep(1 - self.elapsed() % 1)
+
+    def restart(self):
+        # continue from the start time, discounting setup
+        self.t0 = time.monotonic()
+
+"""
+Throughput and deadline statistics of live playout.
+"""
+class PlayoutStats(object):
+    def __init__(self, clock, fmt):
+        self.clock = clock
+        self.fmt = fmt
+        self.t0 = time.monotonic()
+        self.written = 0
+        self.late = 0
+        self.last = None
+        self.renders = 0
+        self.render_total = 0
+        self.render_max = 0
+        # start of the render in progress
+        self.rendering = None
+
+    def write(self, data):
+        self.written += len(data)
+        # a tick is late if more than a second and a half has passed since the last
+        now = self.clock.elapsed()
+        if self.last is not None and now - self.last > 1.5:
+            self.late += 1
+        self.last = now
+
+    def start(self):
+        self.rendering = time.monotonic()
+
+    def render(self, seconds):
+        self.rendering = None
+        self.renders += 1
+        self.render_total += seconds
+        self.render_max = max(self.render_max, seconds)
+
+    def report(self, misses):
+        real = time.monotonic() - self.t0
+        audio = self.written / self.fmt.second_bytes
+        mean = self.render_total / self.renders if self.renders else 0
+        # a render still running at the end has taken at least this long
+        rendering = time.monotonic() - self.rendering if self.rendering else 0
+        render_max = max(self.render_max, rendering)
+        running = " still running" if rendering > self.render_max else ""
+        # a minute is rendered half a minute before it is needed
+        max_speed = f"{'under' if running else 'about'} {30 / render_max:.0f}x" if render_max else "unknown"
+        # stale minutes replayed after a miss don't count as throughput
+        sustained = "realtime" if not misses else "realtime, not sustained"
+        err(f"{audio:.0f} s audio in {real:.1f} s ({audio / real:.1f}x {sustained}, {self.written / real / 1e6:.2f} MB/s)",
+            f"{misses} deadline misses",
+            f"{self.late} late ticks",
+            f"minute render mean {mean:.3f} s max {render_max:.3f} s{running} (max speed {max_speed})",
+            f"{cell_store(self.fmt)}")
+
+"""
+Translation of signed 8-bit samples to WAV's unsigned ones, or None for wider
+samples which WAV stores signed.
+"""
+def wav_table(fmt):
+    return bytes((i + 128) % 256 for i in range(256)) if fmt.bits == 8 else None
+
+"""
+WAV header for the given data size.
+"""
+def wav_header(size, fmt):
+    # sizes saturate beyond 4GB, which most readers treat as unknown
+    size = min(size, 0xffffffff - 36)
+    return struct.pack("<4sI4s4sIHHIIHH4sI",
+            b"RIFF", 36 + size, b"WAVE",
+            b"fmt ", 16, 1, fmt.channels, fmt.rate, fmt.second_bytes, fmt.frame_bytes, fmt.bits,
+            b"data", size)
+
+"""
+Write buffers to a file with one gathered system call where possible.
+"""
+def write_gathered(f, buffers):
+    if not hasattr(os, "writev"):
+        for data in buffers:
+            f.write(data)
+        return
+    f.flush()
+    buffers = [ memoryview(data) for data in buffers ]
+    while buffers:
+        n = os.writev(f.fileno(), buffers)
+        # writev may stop part way through a buffer
+        while buffers and n >= len(buffers[0]):
+            n -= len(buffers.pop(0))
+        if n:
+            buffers[0] = buffers[0][n:]
 
 """
-Double buffer for audio data.
+Discard output, for soak testing.
+"""
+class NullSink(object):
+    def write(self, data):
+        pass
+
+    def writev(self, buffers):
+        pass
+
+    def close(self):
+        pass
+
+"""
+Raw PCM samples written to stdout.
+"""
+class StdoutSink(object):
+    def __init__(self):
+        self.f = sys.stdout.buffer
+
+    def write(self, data):
+        self.f.write(data)
+
+    def writev(self, buffers):
+        write_gathered(self.f, buffers)
+
+    def close(self):
+        self.f.flush()
+
+"""
+Raw PCM samples written to a file.
+"""
+class RawSink(StdoutSink):
+    def __init__(self, path, fmt):
+        self.f = open(path, "wb", buffering=sink_buffer)
+
+    def close(self):
+        self.f.close()
+
+"""
+WAV file, header sizes fixed up on close.
+"""
+class WavSink(RawSink):
+    def __init__(self, path, fmt):
+        super().__init__(path, fmt)
+        self.fmt = fmt
+        self.size = 0
+        self.f.write(self.header())
+        self.table = wav_table(fmt)
+
+    def header(self):
+        return wav_header(self.size, self.fmt)
+
+    def write(self, data):
+        self.f.write(bytes(data).translate(self.table) if self.table else data)
+        self.size += len(data)
+
+    def writev(self, buffers):
+        if self.table:
+            for data in buffers:
+                self.write(data)
+        else:
+            write_gathered(self.f, buffers)
+            self.size += sum(len(data) for data in buffers)
+
+    def close(self):
+        self.f.seek(0)
+        self.f.write(self.header())
+        self.f.close()
+
+"""
+FLAC file (requires soundfile, 16-bit only).
+"""
+class FlacSink(object):
+    def __init__(self, path, fmt):
+        self.f = soundfile.SoundFile(path, "w", samplerate=fmt.rate, channels=fmt.channels, format="FLAC", subtype="PCM_16")
+
+    def write(self, data):
+        self.f.buffer_write(data, dtype="int16")
+
+    def writev(self, buffers):
+        for data in buffers:
+            self.write(data)
+
+    def close(self):
+        self.f.close()
+
+"""
+Output through sox, for playback devices and other formats.
+"""
+class SoxSink(object):
+    def __init__(self, output, fmt):
+        self.proc = run(f"{sox} -q {fmt.raw} - {output}", stdin=PIPE)
+
+    def write(self, data):
+        self.proc.stdin.write(data)
+
+    def writev(self, buffers):
+        write_gathered(self.proc.stdin, buffers)
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+"""
+Shared playout buffer served to local TCP (raw samples) and HTTP (WAV) clients.
+"""
+class ServerSink(object):
+    def __init__(self, host, port, fmt):
+        # the ring must hold everything a client may still be draining
+        if serve_buffer <= serve_timeout + 1:
+            raise ValueError(f"serve_buffer ({serve_buffer} s) must exceed serve_timeout + 1 ({serve_timeout + 1} s)")
+        # ring buffer of the most recent audio, position counts all bytes written
+        self.fmt = fmt
+        self.size = fmt.second_bytes * serve_buffer
+        self.buffer = bytearray(self.size)
+        self.view = memoryview(self.buffer)
+        self.written = 0
+        self.clients = 0
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.start(host, port))
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def start(self, host, port):
+        self.event = asyncio.Event()
+        self.server = await asyncio.start_server(self.client, host, port)
+
+    def write(self, data):
+        data = memoryview(data)[-self.size:]
+        start = self.written % self.size
+        end = min(self.size, start + len(data))
+        self.view[start:end] = data[:end-start]
+        self.view[:len(data)-(end-start)] = data[end-start:]
+        self.written += len(data)
+        self.loop.call_soon_threadsafe(self.notify)
+
+    def writev(self, buffers):
+        for data in buffers:
+            self.write(data)
+
+    def notify(self):
+        # wake every waiting client, later waits use a fresh event
+        (event, self.event) = (self.event, asyncio.Event())
+        event.set()
+
+    async def client(self, reader, writer):
+        # http clients send a request, raw tcp clients send nothing
+        try:
+            request = await asyncio.wait_for(reader.readline(), 0.2)
+            while request.startswith(b"GET") and (await asyncio.wait_for(reader.readline(), 1)).strip():
+                pass
+        except (asyncio.TimeoutError, ConnectionError):
+            request = b""
+        table = None
+        if request.startswith(b"GET"):
+            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: audio/wav\r\nCache-Control: no-cache\r\n\r\n")
+            writer.write(wav_header(0xffffffff, self.fmt))
+            table = wav_table(self.fmt)
+
+        self.clients += 1
+        err(f"listener connected ({self.clients})")
+        # late joiners start at the live position
+        i = self.written
+        try:
+            while True:
+                event = self.event
+                while i < self.written:
+                    # skip ahead if the ring could overtake audio this client
+                    # is still draining (transports may hold views of it)
+                    if self.written - i > self.size - (serve_timeout + 1) * self.fmt.second_bytes:
+                        i = self.written
+                        continue
+                    start = i % self.size
+                    end = min(self.size, start + self.written - i)
+                    chunk = self.view[start:end]
+                    writer.write(bytes(chunk).translate(table) if table else chunk)
+                    i += end - start
+                    # drop listeners too slow to drain before the ring wraps
+                    await asyncio.wait_for(writer.drain(), serve_timeout)
+                await event.wait()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.clients -= 1
+            err(f"listener disconnected ({self.clients})")
+            writer.close()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+"""
+Open an output sink, writing files natively where possible.
+"""
+def open_sink(output, fmt):
+    if output == '-':
+        return StdoutSink()
+    if output in ['null', '-n']:
+        return NullSink()
+    # plain file names only, anything else is passed to sox
+    ext = os.path.splitext(output)[1].lower() if " " not in output and not output.startswith("-") else ""
+    if ext in [".raw", ".pcm"]:
+        return RawSink(output, fmt)
+    if ext == ".wav":
+        return WavSink(output, fmt)
+    if ext == ".flac" and soundfile and fmt.bits == 16:
+        return FlacSink(output, fmt)
+    return SoxSink(output, fmt)
+
+"""
+Double buffer for audio data, handing out views of preallocated buffers.
 """
 class AudioData(object):
-    def __init__(self, a=b"", b=b""):
+    def __init__(self, a, b, fmt):
         self.i = 0
-        self.a = a
-        self.b = b
+        self.fmt = fmt
+        self.second_bytes = fmt.second_bytes
+        # room for a leap second minute
+        self.buffers = [ bytearray(61 * fmt.second_bytes) for _ in range(2) ]
+        self.views = [ memoryview(buffer) for buffer in self.buffers ]
+        # views of whole seconds are made once and reused
+        self.seconds = [ [ view[i:i+self.second_bytes] for i in range(0, len(view), self.second_bytes) ] for view in self.views ]
+        self.lengths = [0, 0]
+        self.active = 0
+        # updates load the inactive buffer while playout may swap to it
+        self.lock = threading.Lock()
+        self.load(0, a)
+        self.load(1, b)
+        # whether b has been updated since it was last active
+        self.fresh = True
+        self.misses = 0
+        # number of minute boundaries played, a render for a boundary that
+        # has already passed is too late to use
+        self.swaps = 0
+
+    def load(self, k, audio):
+        if not audio:
+            raise ValueError("empty minute of audio")
+        self.views[k][:len(audio)] = audio
+        self.lengths[k] = len(audio)
 
     def read(self):
-        size = second_bytes - self.i % second_bytes
-        start = self.i % len(self.a)
-        end = start + size
-        buffer = self.a[start:end]
-        self.seek(len(self.a) if end >= len(self.a) else self.i + size)
+        (second, into) = divmod(self.i, self.second_bytes)
+        if into:
+            # only after seeking part way into a second
+            buffer = self.views[self.active][self.i:(second + 1) * self.second_bytes]
+        else:
+            buffer = self.seconds[self.active][second]
+        self.seek(self.i + len(buffer))
         return buffer
 
-    def swap_inactive(self, audio):
-        self.b = audio
+    def swap_inactive(self, audio, swaps):
+        # playout can't swap to the buffer while it is loading
+        with self.lock:
+            if swaps != self.swaps:
+                return False
+            self.load(self.active ^ 1, audio)
+            self.fresh = True
+            return True
 
     def a_active(self):
-        return self.i < len(self.a)
+        return self.active == 0
 
     def seek(self, i):
-        self.i = i % len(self.a)
-        if self.i < i:
-            self.a, self.b = self.b, self.a
+        with self.lock:
+            self.i = i % self.lengths[self.active]
+            if self.i < i:
+                self.active ^= 1
+                self.swaps += 1
+                # the next minute was not ready in time
+                if not self.fresh:
+                    self.misses += 1
+                self.fresh = False
 
 for c in [sox, espeak_ng]:
     if shutil.which(c) is None:
@@ -541,24 +1161,38 @@ for c in [sox, espeak_ng]:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Simulate WWV/WWVH time signal')
     names = [s for s in station_names.keys()]
-    parser.add_argument("--station", dest="station", choices=names, nargs='?', default=names[0], help="station (WWV/WWVH)")
+    parser.add_argument("--station", dest="station", choices=names, nargs='?', default=names[0], help="station (WWV/WWVH/both)")
+    parser.add_argument("--gain", dest="gain", type=non_negative, nargs=2, metavar=("WWV", "WWVH"), help="station gains when mixing both (default 1 1)")
+    parser.add_argument("--delay", dest="delay", type=non_negative, nargs=2, metavar=("WWV", "WWVH"), help="station propagation delays (ms) when mixing both (default 0 0)")
     parser.add_argument("--date", dest="date_str", nargs='?', help="custom date d/m/y")
     parser.add_argument("--time", dest="time_str", nargs='?', help="custom time H:M:S")
     parser.add_argument("--period", dest="period", nargs='?', help="output given duration of audio and exit H:M:S")
     parser.add_argument("--clock", action="store_true", help="output broadcast time to stderr")
-    parser.add_argument(dest="output", default="-d", nargs='?', help="output destination appended to sox. a value of '-' writes 44.1k 16-bit signed-integer samples to stdout.")
+    parser.add_argument("--speed", dest="speed", type=clock_speed, help="run live playout at the given multiple of real time (for the duration of --period) and report throughput to stderr")
+    parser.add_argument("--serve", dest="serve", metavar="ADDRESS", help="serve audio to local TCP/HTTP listeners on [host:]port instead of output")
+    parser.add_argument("--rate", dest="rate", type=sample_rate, default=default_fmt.rate, help="sample rate (Hz)")
+    parser.add_argument("--bits", dest="bits", type=int, choices=[8, 16, 24, 32], default=default_fmt.bits, help="bits per sample")
+    parser.add_argument("--channels", dest="channels", type=positive, default=default_fmt.channels, help="number of channels")
+    parser.add_argument(dest="output", default="-d", nargs='?', help="output destination appended to sox. .wav, .flac (with soundfile) and .raw files are written directly. a value of '-' writes signed-integer samples in the selected format to stdout, 'null' discards output.")
 
     args = parser.parse_args()
+    if (args.gain or args.delay) and args.station != "both":
+        parser.error("--gain and --delay need --station both")
+    # the ring buffer and slow listener timeout assume a real time clock
+    if args.serve and (args.period or args.speed):
+        parser.error("--serve plays out in real time, without --period or --speed")
     station = station_names[args.station]
     output = args.output or "-d"
+    fmt = AudioFormat(args.rate, args.bits, args.channels)
 
-    if output == '-':
-        out = sys.stdout.buffer
+    if args.serve:
+        (host, _, port) = args.serve.rpartition(":")
+        sink = ServerSink(host or "127.0.0.1", int(port), fmt)
     else:
-        proc = run(f"{sox} -q {raw} - {output}", stdin=PIPE)
-        out = proc.stdin
+        sink = open_sink(output, fmt)
 
-    start = datetime.utcnow()
+    clock = Clock(args.speed or 1)
+    start = clock.now()
 
     # offset if custom date/time set
     if args.date_str or args.time_str:
@@ -571,55 +1205,85 @@ if __name__ == "__main__":
 
     # announced minute
     current_minute = start + offset if offset else start
+    # tone bed carried between consecutive minutes
+    if station == Stations.WWV | Stations.WWVH:
+        stations = [Stations.WWV, Stations.WWVH]
+        gains = args.gain or [1, 1]
+        delays = [ d / 1000 for d in args.delay or [0, 0] ]
+        bed = StationMix(dict(zip(stations, gains)), dict(zip(stations, delays)), fmt)
+    else:
+        bed = MinuteBed(fmt)
     # update at roughly half minute
     next_update = start + timedelta(minutes=1, seconds=30 - current_minute.second, microseconds=-current_minute.microsecond)
 
-    # if period set, output all audio at once
     if args.period:
-        current_minute = start + offset if offset else start
         p = datetime.strptime(f"{args.period}", "%H:%M:%S")
         seconds = timedelta(hours=p.hour, minutes=p.minute, seconds=p.second).total_seconds()
-        audio_bytes = int(seconds * second_bytes)
-        (dut1, leap_second) = get_dut1(current_minute)
-        audio = gen_minute(current_minute, station, dut1, leap_second)
-        current_minute += timedelta(minutes=1)
-        samples = sample_offset(dt) if offset else sample_offset(start)
-        audio = audio[samples:] # offset into minute
-        while len(audio) < audio_bytes:
+
+    # if period set, output all audio at once
+    if args.period and not args.speed:
+        current_minute = start + offset if offset else start
+        remaining = int(seconds * fmt.second_bytes)
+        samples = sample_offset(dt, fmt) if offset else sample_offset(start, fmt)
+        # write each minute as it is generated
+        while remaining > 0:
             (dut1, leap_second) = get_dut1(current_minute)
-            audio += gen_minute(current_minute, station, dut1, leap_second)
+            audio = gen_minute(current_minute, station, dut1, leap_second, fmt, bed)
             current_minute += timedelta(minutes=1)
-        audio = audio[:audio_bytes] # trim final result
-        out.write(audio)
+            audio = memoryview(audio)[samples:samples+remaining] # offset into first minute, trim final
+            samples = 0
+            sink.write(audio)
+            remaining -= len(audio)
+        sink.close()
         sys.exit()
 
     # clock thread
     if args.clock:
-        clock_delay = (datetime.utcnow() - start) / timedelta(microseconds=1) if not offset else 0
+        clock_delay = (clock.now() - start) / timedelta(microseconds=1) if not offset else 0
         clock_offset = offset if offset else timedelta()
-        threading.Thread(target=run_clock, args=(clock_offset + timedelta(microseconds=clock_delay),), daemon=True).start()
+        threading.Thread(target=run_clock, args=(clock, clock_offset + timedelta(microseconds=clock_delay),), daemon=True).start()
 
     # generate initial audio
     (dut1, leap_second) = get_dut1(current_minute)
-    a = gen_minute(current_minute, station, dut1, leap_second)
+    a = gen_minute(current_minute, station, dut1, leap_second, fmt, bed)
     current_minute += timedelta(minutes=1)
     (dut1, leap_second) = get_dut1(current_minute)
-    b = gen_minute(current_minute, station, dut1, leap_second)
-    data = AudioData(a, b)
+    b = gen_minute(current_minute, station, dut1, leap_second, fmt, bed)
+    data = AudioData(a, b, fmt)
+
+    # accelerated clock starts once initial audio is ready
+    if args.speed:
+        clock.restart()
+    end = clock.now() + timedelta(seconds=seconds) if args.speed and args.period else None
+    stats = PlayoutStats(clock, fmt)
 
     # seek to initial offset of first minute
-    samples = sample_offset(dt) if offset else sample_offset(start, datetime.utcnow())
+    samples = sample_offset(dt, fmt) if offset else sample_offset(start, fmt, clock.now())
     data.seek(samples)
 
-    # write a few seconds to start
-    out.write(data.read() + data.read() + data.read() + data.read() + data.read() + data.read())
+    # write a few seconds to start, gathered across the minute boundary
+    audio = [ data.read() for i in range(6) ]
+    sink.writev(audio)
+    for a in audio:
+        stats.write(a)
 
-    while True:
-        out.write(data.read())
-        # update every half minute
-        if (next_update - datetime.utcnow()).total_seconds() < 0:
-            next_update += timedelta(minutes=1)
-            current_minute += timedelta(minutes=1)
-            threading.Thread(target=update_data, args=(data,current_minute,), daemon=True).start()
-        # sleep until next tick
-        time.sleep(1 - time.monotonic() % 1)
+    render = None
+    try:
+        while end is None or clock.now() < end:
+            audio = data.read()
+            sink.write(audio)
+            stats.write(audio)
+            # update every half minute
+            if (next_update - clock.now()).total_seconds() < 0:
+                next_update += timedelta(minutes=1)
+                current_minute += timedelta(minutes=1)
+                # one render at a time, a minute that can't start is skipped
+                # and counted as a miss when playout reaches it
+                if not (render and render.is_alive()):
+                    render = threading.Thread(target=update_data, args=(data,current_minute,bed,stats,), daemon=True)
+                    render.start()
+            clock.tick()
+    finally:
+        sink.close()
+        if args.speed:
+            stats.report(data.misses)